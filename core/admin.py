@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Category, Product, Cart, CartItem, Order, OrderItem
+from .models import User, Category, Product, Cart, CartItem, Order, OrderItem, ProductRecommendation, RecommendationBuild
 
 class UserAdmin(BaseUserAdmin):
     ordering = ['id']
@@ -25,3 +25,5 @@ admin.site.register(Cart)
 admin.site.register(CartItem)
 admin.site.register(Order)
 admin.site.register(OrderItem)
+admin.site.register(ProductRecommendation)
+admin.site.register(RecommendationBuild)
@@ -0,0 +1,7 @@
+# Kept free of NumPy/SciPy so web workers can import it without loading the
+# recommendation builder.
+BUILD_LOCK_KEY = 'product-recommendations:build-lock'
+
+
+def recommendations_cache_key(product_id):
+    return f"product-recommendations:{product_id}"
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Category, Order, OrderItem, Product, User
+from core.recommendations import build_recommendations
+
+BENCHMARK_EMAIL = 'benchmark@example.com'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic order history up to --lines order lines, then time a full and an "
+        "incremental recommendation build. Writes to the configured database: use a scratch one. "
+        "Run it a second time to measure peak memory without the seeding in the same process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=1_000_000, help='Total order lines to benchmark')
+        parser.add_argument('--products', type=int, default=5000, help='Catalog size')
+        parser.add_argument('--refresh-lines', type=int, default=1000, help='New order lines for the incremental run')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write("DEBUG is on: query logging copies the stored counts and inflates peak memory")
+        rng = np.random.default_rng(options['seed'])
+        products = self.seed_products(options['products'])
+        user, _ = User.objects.get_or_create(email=BENCHMARK_EMAIL, defaults={'full_name': 'Benchmark'})
+
+        existing = OrderItem.objects.count()
+        if existing < options['lines']:
+            self.stdout.write(f"Seeding {options['lines'] - existing} order lines...")
+            self.seed_orders(user, products, options['lines'] - existing, rng)
+
+        self.report(build_recommendations())
+        self.seed_orders(user, products, options['refresh_lines'], rng)
+        self.report(build_recommendations(incremental=True))
+
+    def seed_products(self, count):
+        category, _ = Category.objects.get_or_create(name='Benchmark')
+        missing = count - Product.objects.count()
+        if missing > 0:
+            Product.objects.bulk_create(
+                (Product(category=category, name=f"Benchmark product {i}", description='', price=Decimal('1.00'), stock=0)
+                 for i in range(missing)),
+                batch_size=1000,
+            )
+        return np.array(Product.objects.values_list('id', flat=True).order_by('id')[:count])
+
+    def seed_orders(self, user, products, lines, rng, batch_orders=20_000):
+        # Long-tailed popularity with 1-6 lines per order, like a real catalog
+        popularity = 1 / np.arange(1, len(products) + 1) ** 0.8
+        popularity /= popularity.sum()
+        while lines > 0:
+            sizes = rng.integers(1, 7, size=batch_orders)
+            sizes = sizes[np.cumsum(sizes) <= lines] if sizes.sum() > lines else sizes
+            if not len(sizes):
+                sizes = np.array([lines])
+            orders = Order.objects.bulk_create(
+                [Order(user=user, total_price=Decimal('0.00'), status='CONFIRMED') for _ in sizes],
+                batch_size=1000,
+            )
+            picks = rng.choice(products, size=sizes.sum(), p=popularity)
+            order_ids = np.repeat([order.id for order in orders], sizes)
+            OrderItem.objects.bulk_create(
+                (OrderItem(order_id=int(order_id), product_id=int(product_id), quantity=1, price=Decimal('1.00'))
+                 for order_id, product_id in zip(order_ids, picks)),
+                batch_size=5000,
+            )
+            lines -= sizes.sum()
+
+    def report(self, build):
+        if build is None:
+            self.stdout.write("No new order lines")
+            return
+        self.stdout.write(
+            f"{build.get_kind_display()} build: {build.order_lines} order lines, "
+            f"{build.products_updated} products, {build.build_seconds:.1f}s, peak RSS {build.peak_memory_mb:.0f} MB"
+        )
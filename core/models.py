@@ -91,3 +91,44 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
+
+
+class ProductRecommendation(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommendations')
+    recommended_product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('product', 'recommended_product')
+        ordering = ['product', '-score']
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_product_id} ({self.score:.3f})"
+
+
+class RecommendationState(models.Model):
+    # Single row: co-occurrence counts accumulated by the last build, for incremental refreshes
+    counts = models.BinaryField()
+    last_order_item_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Recommendation state up to item {self.last_order_item_id}"
+
+
+class RecommendationBuild(models.Model):
+    KIND_CHOICES = [
+        ('FULL', 'Full'),
+        ('INCREMENTAL', 'Incremental'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    last_order_item_id = models.BigIntegerField(default=0)  # Watermark for the next incremental refresh
+    order_lines = models.PositiveBigIntegerField(default=0)
+    products_updated = models.PositiveIntegerField(default=0)
+    build_seconds = models.FloatField(default=0)
+    peak_memory_mb = models.FloatField(default=0)  # Peak RSS during this build
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} build {self.id} up to item {self.last_order_item_id}"
@@ -0,0 +1,234 @@
+import io
+import logging
+import time
+import tracemalloc
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from scipy import sparse
+
+from .cache_keys import BUILD_LOCK_KEY, recommendations_cache_key
+from .models import OrderItem, Product, ProductRecommendation, RecommendationBuild, RecommendationState
+
+logger = logging.getLogger(__name__)
+
+_MERGE_EVERY = 16  # Chunk products held before summing them into the accumulator
+_DELETE_BATCH_SIZE = 500
+_STATE_PK = 1
+
+
+class RecommendationBuildLocked(Exception):
+    pass
+
+
+def _iter_order_chunks(items, chunk_size):
+    # Stream (order_id, product_id) pairs in order_id order, cutting chunks only
+    # on order boundaries so every basket lands in a single chunk.
+    rows = items.order_by('order_id').values_list('order_id', 'product_id').iterator(chunk_size=chunk_size)
+    buffer = []
+    last_order_id = None
+    for order_id, product_id in rows:
+        if len(buffer) >= chunk_size and order_id != last_order_id:
+            yield np.array(buffer, dtype=np.int64)
+            buffer = []
+        buffer.append((order_id, product_id))
+        last_order_id = order_id
+    if buffer:
+        yield np.array(buffer, dtype=np.int64)
+
+
+def _basket_matrix(chunk, n_products):
+    # One row per order, one column per product id, 1 where the order contains the product.
+    _, rows = np.unique(chunk[:, 0], return_inverse=True)
+    baskets = sparse.csr_matrix(
+        (np.ones(len(chunk), dtype=np.int32), (rows, chunk[:, 1])),
+        shape=(rows.max() + 1, n_products),
+    )
+    baskets.data[:] = 1  # The same product on two lines of one order counts once
+    return baskets
+
+
+def _merge(parts, shape):
+    # Concatenate COO triplets and let the CSR conversion sum duplicates once.
+    parts = [part.tocoo() for part in parts]
+    return sparse.csr_matrix(
+        (
+            np.concatenate([part.data for part in parts]),
+            (np.concatenate([part.row for part in parts]), np.concatenate([part.col for part in parts])),
+        ),
+        shape=shape,
+    )
+
+
+def _cooccurrence(items, n_products, chunk_size):
+    # Sum of baskets.T @ baskets over all chunks; the diagonal holds per-product order counts.
+    shape = (n_products, n_products)
+    parts = [sparse.csr_matrix(shape, dtype=np.int32)]
+    order_lines = 0
+    for chunk in _iter_order_chunks(items, chunk_size):
+        baskets = _basket_matrix(chunk, n_products)
+        parts.append(baskets.T @ baskets)
+        order_lines += len(chunk)
+        if len(parts) > _MERGE_EVERY:
+            parts = [_merge(parts, shape)]
+    return _merge(parts, shape), order_lines
+
+
+def _load_state():
+    # Accumulated co-occurrence counts and the last order item they include.
+    state = RecommendationState.objects.filter(pk=_STATE_PK).first()
+    if state is None:
+        return None, 0
+    with np.load(io.BytesIO(state.counts)) as arrays:
+        counts = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(arrays['shape']))
+    return counts, state.last_order_item_id
+
+
+def _save_state(counts, last_order_item_id):
+    buffer = io.BytesIO()
+    np.savez(buffer, data=counts.data, indices=counts.indices, indptr=counts.indptr, shape=np.array(counts.shape))
+    # update() first so the previous blob is never loaded into memory
+    updated = RecommendationState.objects.filter(pk=_STATE_PK).update(
+        counts=buffer.getbuffer(), last_order_item_id=last_order_item_id,
+    )
+    if not updated:
+        RecommendationState.objects.create(pk=_STATE_PK, counts=buffer.getbuffer(), last_order_item_id=last_order_item_id)
+
+
+class _PeakMemory:
+    # Peak memory of one build. On Linux, writing 5 to clear_refs resets VmHWM so a
+    # long-lived worker doesn't report an earlier task's peak; elsewhere fall back
+    # to tracemalloc, which misses allocations made by the DB driver in C.
+    def __enter__(self):
+        try:
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')
+            self.tracing = False
+        except OSError:
+            tracemalloc.start()
+            self.tracing = True
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.tracing:
+            tracemalloc.stop()
+
+    def peak_mb(self):
+        if self.tracing:
+            return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+
+
+def _top_neighbours(counts, row_products, available, top_k):
+    # Cosine-normalised co-occurrence, so best sellers don't dominate every list.
+    order_counts = counts.diagonal().astype(np.float64)
+    for product_id in row_products:
+        if not available[product_id]:
+            continue
+        start, end = counts.indptr[product_id], counts.indptr[product_id + 1]
+        neighbours = counts.indices[start:end]
+        hits = counts.data[start:end]
+        keep = (neighbours != product_id) & (hits > 0) & available[neighbours]
+        neighbours, hits = neighbours[keep], hits[keep]
+        if not len(neighbours):
+            continue
+
+        scores = hits / np.sqrt(order_counts[product_id] * order_counts[neighbours])
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best])]
+        for neighbour, score in zip(neighbours[best], scores[best]):
+            yield ProductRecommendation(
+                product_id=int(product_id),
+                recommended_product_id=int(neighbour),
+                score=float(score),
+            )
+
+
+def build_recommendations(incremental=False):
+    """
+    Rebuild the "customers also bought" table from order history.
+
+    A full build recounts every order line. An incremental build adds the
+    baskets of orders placed since the last build to the stored counts and
+    re-ranks only the products in those baskets; other products keep their
+    scores until the next full build. Raises RecommendationBuildLocked when
+    another build holds the lock and returns None when there are no new
+    order lines.
+    """
+    token = uuid.uuid4().hex
+    if not cache.add(BUILD_LOCK_KEY, token, settings.RECOMMENDATIONS_LOCK_TIMEOUT):
+        raise RecommendationBuildLocked("Another recommendation build is running")
+    try:
+        with _PeakMemory() as memory:
+            return _build(incremental, memory)
+    finally:
+        # If this build outlived the lock timeout, the lock may now belong to another build
+        if cache.get(BUILD_LOCK_KEY) == token:
+            cache.delete(BUILD_LOCK_KEY)
+
+
+def _build(incremental, memory):
+    started = time.perf_counter()
+    counts, watermark = _load_state() if incremental else (None, 0)
+    if incremental and counts is None:
+        logger.warning("No stored recommendation state; running a full build instead of an incremental refresh")
+    incremental = counts is not None
+
+    max_item_id = OrderItem.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+    if incremental and max_item_id <= watermark:
+        return None
+
+    product_ids = list(Product.objects.values_list('id', flat=True))
+    n_products = max(product_ids, default=0) + 1
+    if incremental:
+        n_products = max(n_products, counts.shape[0])
+    available = np.zeros(n_products, dtype=bool)
+    available[product_ids] = True
+
+    chunk_size = settings.RECOMMENDATIONS_CHUNK_SIZE
+    items = OrderItem.objects.filter(product__isnull=False, id__lte=max_item_id)
+    if incremental:
+        new_orders = OrderItem.objects.filter(id__gt=watermark, id__lte=max_item_id).values('order_id')
+        added, order_lines = _cooccurrence(items.filter(order_id__in=new_orders), n_products, chunk_size)
+        # An order straddling the watermark already had its older lines counted
+        removed, _ = _cooccurrence(items.filter(order_id__in=new_orders, id__lte=watermark), n_products, chunk_size)
+        counts.resize((n_products, n_products))
+        counts = (counts + added - removed).tocsr()
+        row_products = np.flatnonzero(np.diff(added.indptr))
+    else:
+        counts, order_lines = _cooccurrence(items, n_products, chunk_size)
+        row_products = np.flatnonzero(np.diff(counts.indptr))
+
+    recommendations = list(_top_neighbours(counts, row_products, available, settings.RECOMMENDATIONS_TOP_K))
+    with transaction.atomic():
+        if incremental:
+            # Batched so the IN list stays under SQLite's bind parameter limit
+            for start in range(0, len(row_products), _DELETE_BATCH_SIZE):
+                batch = row_products[start:start + _DELETE_BATCH_SIZE].tolist()
+                ProductRecommendation.objects.filter(product_id__in=batch).delete()
+        else:
+            ProductRecommendation.objects.all().delete()
+        ProductRecommendation.objects.bulk_create(recommendations, batch_size=1000)
+        _save_state(counts, max_item_id)
+
+    cached_products = row_products.tolist() if incremental else product_ids
+    cache.delete_many([recommendations_cache_key(product_id) for product_id in cached_products])
+
+    return RecommendationBuild.objects.create(
+        kind='INCREMENTAL' if incremental else 'FULL',
+        last_order_item_id=max_item_id,
+        order_lines=order_lines,
+        products_updated=len(row_products),
+        build_seconds=time.perf_counter() - started,
+        peak_memory_mb=memory.peak_mb(),
+    )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import User, Product, Category, Cart, CartItem, Order, OrderItem
+from .models import User, Product, Category, Cart, CartItem, Order, OrderItem, ProductRecommendation
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -23,6 +23,13 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'name', 'description', 'price', 'stock', 'image', 'category']
 
+class ProductRecommendationSerializer(serializers.ModelSerializer):
+    product = ProductSerializer(source='recommended_product', read_only=True)
+
+    class Meta:
+        model = ProductRecommendation
+        fields = ['product', 'score']
+
 class CartItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_price = serializers.DecimalField(source='product.price', max_digits=10, decimal_places=2, read_only=True)
@@ -27,3 +27,26 @@ def send_order_confirmation_email(order_id):
         return "Email sent"
     except Order.DoesNotExist:
         return "Order not found"
+
+def _build_summary(build):
+    if build is None:
+        return "No new order lines"
+    return (f"{build.get_kind_display()} build: {build.order_lines} order lines, {build.products_updated} products "
+            f"in {build.build_seconds:.1f}s, peak memory {build.peak_memory_mb:.1f} MB")
+
+# Retries for up to RECOMMENDATIONS_LOCK_TIMEOUT so a running refresh can't cost a day's full build
+@shared_task(bind=True, max_retries=24, default_retry_delay=5 * 60)
+def build_product_recommendations(self):
+    from .recommendations import RecommendationBuildLocked, build_recommendations  # Keeps NumPy/SciPy out of web workers
+    try:
+        return _build_summary(build_recommendations())
+    except RecommendationBuildLocked as exc:
+        raise self.retry(exc=exc)
+
+@shared_task
+def refresh_product_recommendations():
+    from .recommendations import RecommendationBuildLocked, build_recommendations
+    try:
+        return _build_summary(build_recommendations(incremental=True))
+    except RecommendationBuildLocked:
+        return "Skipped: another build is running"
@@ -1,3 +1,164 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Category, Order, OrderItem, Product, ProductRecommendation, RecommendationBuild, User
+from .cache_keys import BUILD_LOCK_KEY
+from .recommendations import RecommendationBuildLocked, build_recommendations
+from .tasks import build_product_recommendations, refresh_product_recommendations
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, RECOMMENDATIONS_TOP_K=10, RECOMMENDATIONS_CHUNK_SIZE=2)
+class ProductRecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(email='buyer@example.com', password='secret', full_name='Buyer')
+        category = Category.objects.create(name='Gadgets')
+        self.a, self.b, self.c, self.d = [
+            Product.objects.create(category=category, name=name, description='', price=Decimal('10.00'), stock=10)
+            for name in 'abcd'
+        ]
+        self.place_order(self.a, self.b, self.b)  # Duplicate line counts once
+        self.order = self.place_order(self.a, self.b, self.c)
+        self.place_order(self.a, self.c)
+        self.place_order(self.c)
+
+    def place_order(self, *products, order=None):
+        order = order or Order.objects.create(user=self.user, total_price=Decimal('0.00'))
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        return order
+
+    def recommendations(self, product):
+        return [
+            (rec.recommended_product, round(rec.score, 4))
+            for rec in ProductRecommendation.objects.filter(product=product).order_by('-score')
+        ]
+
+    def test_full_build_scores_cooccurrence(self):
+        build = build_recommendations()
+
+        self.assertEqual(build.kind, 'FULL')
+        self.assertEqual(build.order_lines, 9)
+        self.assertEqual(build.products_updated, 3)
+        # a is in 3 orders, b in 2, c in 3; a+b share 2, a+c share 2, b+c share 1
+        self.assertEqual(self.recommendations(self.a), [(self.b, 0.8165), (self.c, 0.6667)])
+        self.assertEqual(self.recommendations(self.b), [(self.a, 0.8165), (self.c, 0.4082)])
+        self.assertEqual(self.recommendations(self.d), [])
+
+    def test_incremental_refresh_adds_new_orders(self):
+        build_recommendations()
+        self.place_order(self.b, self.d)
+
+        build = build_recommendations(incremental=True)
+
+        self.assertEqual(build.kind, 'INCREMENTAL')
+        self.assertEqual(build.order_lines, 2)
+        self.assertEqual(build.products_updated, 2)
+        self.assertEqual(self.recommendations(self.b), [(self.a, 0.6667), (self.d, 0.5774), (self.c, 0.3333)])
+        self.assertEqual(self.recommendations(self.d), [(self.b, 0.5774)])
+
+    def test_incremental_refresh_matches_full_build_for_updated_order(self):
+        build_recommendations()
+        self.place_order(self.d, order=self.order)  # Order straddling the watermark
+
+        build_recommendations(incremental=True)
+        incremental = {product: self.recommendations(product) for product in (self.a, self.b, self.c, self.d)}
+        build_recommendations()
+
+        for product, recommendations in incremental.items():
+            self.assertEqual(recommendations, self.recommendations(product))
+
+    def test_incremental_refresh_without_state_warns_and_builds_everything(self):
+        with self.assertLogs('core.recommendations', level='WARNING'):
+            build = build_recommendations(incremental=True)
+
+        self.assertEqual(build.kind, 'FULL')
+        self.assertEqual(build.order_lines, 9)
+
+    def test_incremental_refresh_without_new_orders_is_skipped(self):
+        build_recommendations()
+
+        self.assertIsNone(build_recommendations(incremental=True))
+        self.assertEqual(RecommendationBuild.objects.count(), 1)
+
+    def test_build_is_refused_while_locked(self):
+        cache.add(BUILD_LOCK_KEY, 'refresh')
+
+        with self.assertRaises(RecommendationBuildLocked):
+            build_recommendations()
+        self.assertFalse(RecommendationBuild.objects.exists())
+
+    def test_full_build_task_retries_while_refresh_holds_lock(self):
+        cache.add(BUILD_LOCK_KEY, 'refresh')
+
+        with mock.patch.object(build_product_recommendations, 'retry', side_effect=Retry) as retry:
+            with self.assertRaises(Retry):
+                build_product_recommendations()
+        self.assertIsInstance(retry.call_args.kwargs['exc'], RecommendationBuildLocked)
+        self.assertFalse(RecommendationBuild.objects.exists())
+
+        cache.delete(BUILD_LOCK_KEY)  # The refresh finishes before the retry runs
+        build_product_recommendations()
+
+        self.assertEqual(RecommendationBuild.objects.get().kind, 'FULL')
+
+    def test_refresh_task_skips_while_locked(self):
+        cache.add(BUILD_LOCK_KEY, 'full')
+
+        self.assertEqual(refresh_product_recommendations(), "Skipped: another build is running")
+
+    def test_build_keeps_lock_taken_over_by_another_build(self):
+        def take_over_lock(*args):
+            cache.set(BUILD_LOCK_KEY, 'other-build')
+
+        with mock.patch('core.recommendations._build', side_effect=take_over_lock):
+            build_recommendations()
+
+        self.assertEqual(cache.get(BUILD_LOCK_KEY), 'other-build')
+
+    def test_endpoint_unknown_product(self):
+        response = self.client.get(reverse('product-recommendations', args=[9999]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_endpoint_serves_cached_recommendations(self):
+        build_recommendations()
+        url = reverse('product-recommendations', args=[self.b.id])
+
+        first = self.client.get(url)
+        ProductRecommendation.objects.all().delete()
+        second = self.client.get(url)
+
+        self.assertEqual([rec['product']['id'] for rec in first.data], [self.a.id, self.c.id])
+        self.assertEqual(second.data, first.data)
+
+    def test_endpoint_serves_live_product_data(self):
+        build_recommendations()
+        url = reverse('product-recommendations', args=[self.b.id])
+        self.client.get(url)
+
+        Product.objects.filter(id=self.a.id).update(price=Decimal('12.50'))
+        self.c.delete()
+        response = self.client.get(url)
+
+        self.assertEqual([rec['product']['id'] for rec in response.data], [self.a.id])
+        self.assertEqual(response.data[0]['product']['price'], '12.50')
+
+    def test_endpoint_cache_is_invalidated_by_rebuild(self):
+        build_recommendations()
+        url = reverse('product-recommendations', args=[self.b.id])
+        self.client.get(url)
+
+        self.place_order(self.b, self.d)
+        build_recommendations(incremental=True)
+        response = self.client.get(url)
+
+        self.assertEqual([rec['product']['id'] for rec in response.data], [self.a.id, self.d.id, self.c.id])
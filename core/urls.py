@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import RegisterView, ProductListView, CartDetailView, AddToCartView, UpdateCartItemView, RemoveCartItemView, OrderCreateView, OrderListView, RazorpayOrderCreateView, RazorpayVerifyView, AdminOrderListView, AdminOrderStatusUpdateView
+from .views import RegisterView, ProductListView, ProductRecommendationListView, CartDetailView, AddToCartView, UpdateCartItemView, RemoveCartItemView, OrderCreateView, OrderListView, RazorpayOrderCreateView, RazorpayVerifyView, AdminOrderListView, AdminOrderStatusUpdateView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('products/', ProductListView.as_view(), name='product-list'),
+    path('products/<int:pk>/recommendations/', ProductRecommendationListView.as_view(), name='product-recommendations'),
     path('cart/', CartDetailView.as_view(), name='cart-detail'),
     path('cart/add/', AddToCartView.as_view(), name='cart-add'),
     path('cart/update/<int:item_id>/', UpdateCartItemView.as_view(), name='cart-update'),
@@ -1,14 +1,16 @@
 import razorpay
 from django.conf import settings
+from django.core.cache import cache
 from rest_framework import generics, filters, permissions, status
 from rest_framework.response import Response
-from .models import OrderItem, User, Product, Cart, CartItem, Order
-from .serializers import AdminOrderUpdateSerializer, OrderSerializer, RegisterSerializer, ProductSerializer, CartSerializer, CartItemSerializer
+from .models import OrderItem, User, Product, Cart, CartItem, Order, ProductRecommendation
+from .serializers import AdminOrderUpdateSerializer, OrderSerializer, RegisterSerializer, ProductSerializer, ProductRecommendationSerializer, CartSerializer, CartItemSerializer
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from razorpay.errors import SignatureVerificationError
 from .tasks import send_order_confirmation_email
 from .permissions import IsAdminUser
+from .cache_keys import recommendations_cache_key
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -22,6 +24,28 @@ class ProductListView(generics.ListAPIView):
     search_fields = ['name', 'description']  # Enables ?search=keyboard
     ordering_fields = ['price', 'name']      # Enables ?ordering=price
 
+class ProductRecommendationListView(APIView):
+    # "Customers also bought", precomputed by the build_product_recommendations task.
+    # Only (product id, score) pairs are cached; products are serialized live per request.
+    def get(self, request, pk):
+        key = recommendations_cache_key(pk)
+        neighbours = cache.get(key)
+        cached = neighbours is not None
+        if not cached:
+            neighbours = list(ProductRecommendation.objects.filter(product_id=pk).values_list('recommended_product_id', 'score'))
+        products = Product.objects.select_related('category').in_bulk([pk] + [product_id for product_id, _ in neighbours])
+        if pk not in products:
+            return Response({'error': 'Product not found'}, status=404)
+        if not cached:
+            cache.set(key, neighbours, settings.RECOMMENDATIONS_CACHE_TIMEOUT)
+
+        recommendations = [
+            ProductRecommendation(recommended_product=products[product_id], score=score)
+            for product_id, score in neighbours if product_id in products
+        ]
+        serializer = ProductRecommendationSerializer(recommendations, many=True, context={'request': request})
+        return Response(serializer.data)
+
 class CartDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -145,4 +146,29 @@ CELERY_BROKER_URL = 'redis://localhost:6379/0'
 INSTALLED_APPS += ['django_celery_results']
 CELERY_RESULT_BACKEND = 'django-db'
 
+# Shared with the Celery worker so recommendation rebuilds can invalidate cached responses
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
+# "Customers also bought" recommendations (run `celery -A ecommerce beat` to schedule)
+RECOMMENDATIONS_TOP_K = 10
+RECOMMENDATIONS_CHUNK_SIZE = 50000  # Order lines per sparse batch
+RECOMMENDATIONS_CACHE_TIMEOUT = 60 * 60
+RECOMMENDATIONS_LOCK_TIMEOUT = 2 * 60 * 60  # Longer than a full build; frees the lock if a worker dies
+
+CELERY_BEAT_SCHEDULE = {
+    'build-product-recommendations': {
+        'task': 'core.tasks.build_product_recommendations',
+        'schedule': crontab(hour=3, minute=7),  # Off the quarter hours used by the refresh
+    },
+    'refresh-product-recommendations': {
+        'task': 'core.tasks.refresh_product_recommendations',
+        'schedule': crontab(minute='*/15'),
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'